@@ -65,23 +65,25 @@ class ModalWindow():
 				self.resetButton.handleMouseUp(event)
 
 class Display():
+	# number sprites, kept on the class so render.py draws from the same rects
+	negative = (130,0,13,23)
+	numberSprites = [
+		(0,0,13,23),
+		(13,0,13,23),
+		(26,0,13,23),
+		(39,0,13,23),
+		(52,0,13,23),
+		(65,0,13,23),
+		(78,0,13,23),
+		(91,0,13,23),
+		(104,0,13,23),
+		(117,0,13,23),
+	]
+
 	def __init__(self, rect, length):
 		self.rect = rect
 		self.length = length
 		self.numberSS = SpriteSheet('spritesheets/number-sprites.png')
-		self.negative = (130,0,13,23)
-		self.numberSprites = [
-			(0,0,13,23),
-			(13,0,13,23),
-			(26,0,13,23),
-			(39,0,13,23),
-			(52,0,13,23),
-			(65,0,13,23),
-			(78,0,13,23),
-			(91,0,13,23),
-			(104,0,13,23),
-			(117,0,13,23),
-		]
 		
 		self.scale = readOrCreatePickle('save', Settings()).scale
 		self.spriteSize = (int(13 * self.scale), int(23 * self.scale))
@@ -101,6 +103,11 @@ class Display():
 				self.displaySurface.blit(pygame.transform.scale(self.numberSS.image_at(self.numberSprites[spriteIndex]), self.spriteSize), ((13 * self.scale) * index, 0))
 
 class Button():
+	buttonSprites = {
+		'blank': [(0,0,24,24), (24,0,24,24)],
+		'config': [(0,24,24,24), (24,24,24,24)],
+	}
+
 	def __init__(self, pos, onMouseUp, type = 'blank'):
 		self.onMouseUp = onMouseUp
 		self.type = type
@@ -109,11 +116,6 @@ class Button():
 		self.spriteSize = (int(24 * self.scale), int(24 * self.scale))
 
 		self.buttonSS = SpriteSheet('spritesheets/button-sprites.png')
-		self.buttonSprites = {
-			'blank': [(0,0,24,24), (24,0,24,24)],
-			'config': [(0,24,24,24), (24,24,24,24)],
-		}
-
 
 		self.surf = pygame.transform.scale(self.buttonSS.image_at(self.buttonSprites[self.type][0]), self.spriteSize)
 		# self.surf.set_colorkey((0, 0, 0), pygame.RLEACCEL)
@@ -139,16 +141,17 @@ class Button():
 
 
 class Face():
+	smile = (0,0,24,24)
+	clicked = (24,0,24,24)
+	cellPushed = (48,0,24,24)
+	win = (72,0,24,24)
+	dead = (96,0,24,24)
+
 	def __init__(self, pos):
 		self.scale = readOrCreatePickle('save', Settings()).scale
 		self.spriteSize = (int(24 * self.scale), int(24 * self.scale))
 
 		self.faceSS = SpriteSheet('spritesheets/face-sprites.png')
-		self.smile = (0,0,24,24)
-		self.clicked = (24,0,24,24)
-		self.cellPushed = (48,0,24,24)
-		self.win = (72,0,24,24)
-		self.dead = (96,0,24,24)
 
 		self.isPressed = False
 
@@ -163,6 +166,33 @@ class Face():
 		self.surf = pygame.transform.scale(self.faceSS.image_at(sprite), self.spriteSize)
 
 class Cell():
+	# cell sprites
+	normal = (0,0,16,16)
+	clicked = (16,0,16,16)
+	flag = (32,0,16,16)
+	question = (48,0,16,16)
+	questionClicked = (64,0,16,16)
+	bomb = (80,0,16,16)
+	bombClicked = (96,0,16,16)
+	bombIncorrect = (112,0,16,16)
+	numberSprites = [
+		(0,16,16,16),
+		(16,16,16,16),
+		(32,16,16,16),
+		(48,16,16,16),
+		(64,16,16,16),
+		(80,16,16,16),
+		(96,16,16,16),
+		(112,16,16,16),
+		(128,16,16,16)
+	]
+
+	cellStates = [
+		normal,
+		flag,
+		question
+	]
+
 	def __init__(self, x, y):
 		self.scale = readOrCreatePickle('save', Settings()).scale
 		self.spriteSize = (int(16 * self.scale), int(16 * self.scale))
@@ -176,33 +206,6 @@ class Cell():
 
 		self.cellSS = SpriteSheet('spritesheets/cell-sprites.png')
 
-		# cell sprites
-		self.normal = (0,0,16,16)
-		self.clicked = (16,0,16,16)
-		self.flag = (32,0,16,16)
-		self.question = (48,0,16,16)
-		self.questionClicked = (64,0,16,16)
-		self.bomb = (80,0,16,16)
-		self.bombClicked = (96,0,16,16)
-		self.bombIncorrect = (112,0,16,16)
-		self.numberSprites = [
-			(0,16,16,16),
-			(16,16,16,16),
-			(32,16,16,16),
-			(48,16,16,16),
-			(64,16,16,16),
-			(80,16,16,16),
-			(96,16,16,16),
-			(112,16,16,16),
-			(128,16,16,16)
-		]
-
-		self.cellStates = [
-			self.normal,
-			self.flag,
-			self.question
-		]
-
 		self.surf = pygame.transform.scale(self.cellSS.image_at(self.normal), self.spriteSize)
 		self.surf.set_colorkey((0, 0, 0), pygame.RLEACCEL)
 	
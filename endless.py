@@ -0,0 +1,335 @@
+# Minesweeper endless mode
+# The board has no edges. It is split into fixed size chunks whose bombs are
+# derived from a global seed and the chunk coordinates, so a chunk is only
+# generated once the viewport or a reveal reaches it. Chunks far out of view are
+# evicted, keeping only a compressed copy of their cell states if they were
+# played, so memory grows with the explored area rather than a board size.
+
+import sys
+import math
+import zlib
+import random
+import collections
+import pygame
+from pygame.locals import (
+	K_UP,
+	K_DOWN,
+	K_LEFT,
+	K_RIGHT,
+	KEYDOWN
+)
+
+from classes import Cell
+from minesweeper import Minesweeper, GameState
+
+CHUNK_SIZE = 16
+# chunks further than this from the viewport, in chunks, are evicted
+EVICT_DISTANCE = 2
+# cells revealed per frame, a bigger cascade carries on over the next frames
+REVEAL_PER_FRAME = 2000
+
+# per cell state bits stored in a chunk
+LOCKED_MASK = 3 # 0 = unlocked, 1 = flagged, 2 = question
+REVEALED = 4
+DEFUSED = 8 # bomb removed by a first click
+
+class Chunk():
+	def __init__(self, seed, chunkX, chunkY, bombRatio, states = None):
+		cellCount = CHUNK_SIZE * CHUNK_SIZE
+		chunkRandom = random.Random('%d:%d:%d' % (seed, chunkX, chunkY))
+
+		self.bombs = bytearray(cellCount)
+		for index in chunkRandom.sample(range(cellCount), math.floor(cellCount * bombRatio)):
+			self.bombs[index] = 1
+
+		self.states = bytearray(cellCount) if states is None else states
+		if states is not None:
+			for index, state in enumerate(states):
+				if state & DEFUSED:
+					self.bombs[index] = 0
+
+	def isPlayed(self):
+		return any(self.states)
+
+class EndlessBoard():
+	def __init__(self, seed, bombRatio):
+		self.seed = seed
+		self.bombRatio = bombRatio
+		self.chunks = {}
+		# compressed cell states of evicted chunks that had been played
+		self.storedChunks = {}
+		# cells waiting to be revealed by a cascade, the set stops a cell being queued twice.
+		# Revealed breadth first, so only the edge of the cascade is ever queued
+		self.pending = collections.deque()
+		self.queued = set()
+		self.revealedCellCount = 0
+
+	def _chunkAt(self, x, y):
+		key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+		chunk = self.chunks.get(key)
+		if chunk is None:
+			stored = self.storedChunks.pop(key, None)
+			states = bytearray(zlib.decompress(stored)) if stored is not None else None
+			chunk = Chunk(self.seed, key[0], key[1], self.bombRatio, states)
+			self.chunks[key] = chunk
+
+		return chunk, (y % CHUNK_SIZE) * CHUNK_SIZE + (x % CHUNK_SIZE)
+
+	def isBomb(self, x, y):
+		chunk, index = self._chunkAt(x, y)
+		return chunk.bombs[index] == 1
+
+	def state(self, x, y):
+		chunk, index = self._chunkAt(x, y)
+		return chunk.states[index]
+
+	def cycleLockedState(self, x, y):
+		chunk, index = self._chunkAt(x, y)
+		state = chunk.states[index]
+		lockedState = 0 if state & LOCKED_MASK == 2 else (state & LOCKED_MASK) + 1
+		chunk.states[index] = (state & ~LOCKED_MASK) | lockedState
+
+	def defuse(self, x, y):
+		chunk, index = self._chunkAt(x, y)
+		chunk.bombs[index] = 0
+		chunk.states[index] |= DEFUSED
+
+	def neighbouringBombs(self, x, y):
+		count = 0
+		for neighbourY in (y - 1, y, y + 1):
+			for neighbourX in (x - 1, x, x + 1):
+				if self.isBomb(neighbourX, neighbourY):
+					count += 1
+		return count
+
+	def reveal(self, x, y):
+		self._queue(x, y)
+		self.step(REVEAL_PER_FRAME)
+
+	def _queue(self, x, y):
+		if (x, y) not in self.queued:
+			self.queued.add((x, y))
+			self.pending.append((x, y))
+
+	def stopReveal(self):
+		self.pending.clear()
+		self.queued.clear()
+
+	def step(self, limit):
+		# iterative flood, the cascade has no board edge to stop a recursion
+		revealed = 0
+		while self.pending and revealed < limit:
+			x, y = self.pending.popleft()
+			self.queued.discard((x, y))
+			chunk, index = self._chunkAt(x, y)
+			state = chunk.states[index]
+			if state & REVEALED or state & LOCKED_MASK == 1:
+				continue
+
+			chunk.states[index] = state | REVEALED
+			revealed += 1
+
+			if self.neighbouringBombs(x, y) == 0:
+				for neighbourY in (y - 1, y, y + 1):
+					for neighbourX in (x - 1, x, x + 1):
+						state = self.state(neighbourX, neighbourY)
+						if not state & REVEALED and not state & LOCKED_MASK == 1:
+							self._queue(neighbourX, neighbourY)
+
+		self.revealedCellCount += revealed
+
+	def evict(self, x, y, width, height):
+		minChunkX = x // CHUNK_SIZE - EVICT_DISTANCE
+		maxChunkX = (x + width) // CHUNK_SIZE + EVICT_DISTANCE
+		minChunkY = y // CHUNK_SIZE - EVICT_DISTANCE
+		maxChunkY = (y + height) // CHUNK_SIZE + EVICT_DISTANCE
+
+		for key in list(self.chunks):
+			chunkX, chunkY = key
+			if minChunkX <= chunkX <= maxChunkX and minChunkY <= chunkY <= maxChunkY:
+				continue
+
+			chunk = self.chunks.pop(key)
+			# unplayed chunks can be regenerated from the seed, so aren't kept
+			if chunk.isPlayed():
+				self.storedChunks[key] = zlib.compress(bytes(chunk.states))
+
+class EndlessMinesweeper(Minesweeper):
+	def __init__(self, seed = None, lowLatency = False):
+		self.seed = random.randrange(2 ** 32) if seed is None else seed
+		self.clickedBomb = None
+		self.pressedCell = None
+		super().__init__(lowLatency)
+		pygame.key.set_repeat(200, 30)
+
+	def _initGame(self):
+		self.board = EndlessBoard(self.seed, self.settings.bombRatio)
+		# world position of the top left cell on screen, start with the origin centred
+		self.viewX = -(self.settings.boardWidth // 2)
+		self.viewY = -(self.settings.boardHeight // 2)
+		self.clickedBomb = None
+		self.pressedCell = None
+
+		# the cells on screen are reused as tiles for whichever part of the board is in view
+		self.cells = []
+		cellSize = 16 * self.settings.scale
+		for row in range(self.settings.boardHeight):
+			self.cells.append([])
+			for col in range(self.settings.boardWidth):
+				cell = Cell((col * cellSize), (row * cellSize) + self.faceButtonRowHeight)
+				self.sprites.append(cell)
+				self.cells[row].append(cell)
+
+		self.spriteSurfaces = {}
+		self.tileSprites = {}
+		self.flagDisplay.setDisplay(0)
+		self.viewChanged = True
+
+	def resetGame(self):
+		self.seed = random.randrange(2 ** 32)
+		# endless games aren't recorded in the saved stats, resetting one isn't counted either
+		self.gameState = GameState.IDLE.value
+		super().resetGame()
+
+	def _tileSurface(self, sprite):
+		# scaled sprites are shared between tiles, panning would otherwise rescale every cell
+		surface = self.spriteSurfaces.get(sprite)
+		if surface is None:
+			cell = self.cells[0][0]
+			surface = pygame.transform.scale(cell.cellSS.image_at(sprite), cell.spriteSize)
+			self.spriteSurfaces[sprite] = surface
+		return surface
+
+	def _cellSprite(self, cell, x, y):
+		state = self.board.state(x, y)
+		lockedState = state & LOCKED_MASK
+
+		# pressed state is kept by world position, the tile under it changes when panning
+		if (x, y) == self.pressedCell:
+			return cell.questionClicked if lockedState == 2 else cell.clicked
+
+		if state & REVEALED:
+			neighbouringBombs = self.board.neighbouringBombs(x, y)
+			return cell.clicked if neighbouringBombs == 0 else cell.numberSprites[neighbouringBombs - 1]
+
+		isBomb = self.board.isBomb(x, y)
+		if self.gameState == GameState.LOST.value:
+			if isBomb and not lockedState == 1:
+				return cell.bombClicked if (x, y) == self.clickedBomb else cell.bomb
+			if not isBomb and lockedState == 1:
+				return cell.bombIncorrect
+
+		if self.showBombs and isBomb:
+			return cell.bomb
+
+		return cell.cellStates[lockedState]
+
+	def _syncViewport(self):
+		for row, tiles in enumerate(self.cells):
+			for col, cell in enumerate(tiles):
+				sprite = self._cellSprite(cell, self.viewX + col, self.viewY + row)
+				if self.tileSprites.get((row, col)) != sprite:
+					cell.surf = self._tileSurface(sprite)
+					self.tileSprites[(row, col)] = sprite
+
+	def _updateScreen(self):
+		if self.board.pending:
+			self.board.step(REVEAL_PER_FRAME)
+			self.viewChanged = True
+
+		if self.viewChanged:
+			self.board.evict(self.viewX, self.viewY, self.settings.boardWidth, self.settings.boardHeight)
+			self._syncViewport()
+			self.flagDisplay.setDisplay(min(self.board.revealedCellCount, 10 ** self.settings.displayLength - 1))
+			self.viewChanged = False
+
+		super()._updateScreen()
+
+	def _handleEvent(self, event):
+		# arrow keys pan the view instead of resizing the board
+		if event.type == KEYDOWN and event.key in (K_UP, K_DOWN, K_LEFT, K_RIGHT):
+			if event.key == K_UP:
+				self.viewY -= 1
+			if event.key == K_DOWN:
+				self.viewY += 1
+			if event.key == K_LEFT:
+				self.viewX -= 1
+			if event.key == K_RIGHT:
+				self.viewX += 1
+		else:
+			super()._handleEvent(event)
+
+		self.viewChanged = True
+
+	def _cellAtMouse(self):
+		mouseX, mouseY = pygame.mouse.get_pos()
+		cellSize = 16 * self.settings.scale
+		col = math.floor(mouseX / cellSize)
+		row = math.floor((mouseY - self.faceButtonRowHeight) / cellSize)
+		if 0 <= row < self.settings.boardHeight and 0 <= col < self.settings.boardWidth:
+			return row, col
+		return None
+
+	def _handleCellMouseDown(self, event):
+		position = self._cellAtMouse()
+		if position is None or self.gameState == GameState.LOST.value:
+			return
+
+		row, col = position
+		x, y = self.viewX + col, self.viewY + row
+		state = self.board.state(x, y)
+		if state & REVEALED:
+			return
+
+		self.face.applySprite(self.face.cellPushed)
+		# if left clicking, handle cell opening
+		if event.button == 1 and not state & LOCKED_MASK == 1:
+			self.pressedCell = (x, y)
+
+		# if right clicking, handle cell flagging and question marking
+		if event.button == 3:
+			self.board.cycleLockedState(x, y)
+
+	def _handleCellMouseUp(self, event):
+		if self.pressedCell is None:
+			return
+
+		x, y = self.pressedCell
+		self.pressedCell = None
+
+		position = self._cellAtMouse()
+		if position is None or (self.viewX + position[1], self.viewY + position[0]) != (x, y):
+			return
+
+		self.clickCount += 1
+		if self.clickCount == 1:
+			self.startTicks = pygame.time.get_ticks()
+			self.gameState = GameState.RUNNING.value
+
+		if self.board.isBomb(x, y):
+			if self.clickCount == 1:
+				self.board.defuse(x, y)
+			else:
+				self._handleBombClick(x, y)
+				return
+
+		self.board.reveal(x, y)
+
+	def _handleBombClick(self, x, y):
+		# endless games aren't recorded in the wins and losses
+		self.face.applySprite(self.face.dead)
+		self.gameState = GameState.LOST.value
+		self.clickedBomb = (x, y)
+		self.board.stopReveal()
+
+	def _showControls(self):
+		print('Use <Arrow Keys> to move around the board')
+		print('Use <Minus> and <Plus> to change the scale of the UI')
+		print('Use <B> to reveal/hide bombs')
+		print('Use <L> to print input latency, <P> to switch frame pacing')
+
+if __name__ == '__main__':
+	args = [arg for arg in sys.argv[1:] if arg != '--low-latency']
+	seed = int(args[0]) if args else None
+	minesweeper = EndlessMinesweeper(seed, '--low-latency' in sys.argv)
+	minesweeper.runGame()
@@ -0,0 +1,40 @@
+# Input to display latency
+# Inputs are timestamped as they arrive, while the game waits on the event queue
+# for its next frame, and matched to the next display flip after they've been
+# handled, the first frame that can show their effect.
+
+import math
+import time
+import collections
+
+class LatencyTracker():
+	def __init__(self, maxSamples = 1000):
+		# latencies in milliseconds, only the most recent are kept
+		self.samples = collections.deque(maxlen=maxSamples)
+		self.pending = []
+
+	def markInput(self, arrivalTime):
+		# called once the input has been handled, with the perf_counter time it arrived
+		self.pending.append(arrivalTime)
+
+	def markDisplayed(self):
+		if self.pending:
+			now = time.perf_counter()
+			self.samples.extend((now - inputTime) * 1000 for inputTime in self.pending)
+			self.pending.clear()
+
+	def percentile(self, percent):
+		# nearest rank percentile
+		ordered = sorted(self.samples)
+		rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+		return ordered[rank - 1]
+
+	def report(self, label):
+		if not self.samples:
+			return 'Input latency (' + label + '): no inputs yet'
+		return 'Input latency (' + label + '): p50 %.1fms, p95 %.1fms, p99 %.1fms over %d inputs' % (
+			self.percentile(50), self.percentile(95), self.percentile(99), len(self.samples))
+
+	def reset(self):
+		self.samples.clear()
+		self.pending.clear()
@@ -6,6 +6,8 @@ import random
 import math
 import pygame
 import sys
+import time
+import json
 import pickle
 from enum import Enum
 from pygame.locals import (
@@ -16,10 +18,13 @@ from pygame.locals import (
 	K_ESCAPE,
 	K_LCTRL,
 	K_b,
+	K_l,
+	K_p,
 	K_MINUS,
 	K_EQUALS,
 	KEYDOWN,
 	KEYUP,
+	NOEVENT,
 	QUIT,
 	MOUSEBUTTONUP,
 	MOUSEBUTTONDOWN,
@@ -30,6 +35,12 @@ from pygame.locals import (
 from classes import Face, Cell, Display, Button, ModalWindow
 from settings import Settings
 from helpers import readOrCreatePickle, listToString
+from latency import LatencyTracker
+
+# Version of the records saved to games.jsonl. render.py replays them with its own
+# copy of the bomb placement and reveal rules, so bump this whenever _generateBombs,
+# _handleCellMouseUp or _checkCellNeighbours change and update ReplayBoard to match
+GAME_RECORD_VERSION = 1
 
 class GameState(Enum):
 	LOST = 0
@@ -39,10 +50,15 @@ class GameState(Enum):
 	LOCKED = 4
 
 class Minesweeper:
-	def __init__(self):
+	def __init__(self, lowLatency = False):
 		# init game and assets 
 		pygame.init()
-		self.clock = pygame.time.Clock()
+		self.frameDeadline = time.perf_counter()
+		# when set, draw straight after handling input and only sleep once the frame is shown
+		self.lowLatency = lowLatency
+		self.latency = LatencyTracker()
+		# (arrival time, event) taken off the queue while waiting for the next frame
+		self.waitedEvents = []
 		self.startTicks = pygame.time.get_ticks()
 		self.gameTime = float()
 		self.gameState = GameState.IDLE.value # 0 = lost, 1 = running, 2 = win, 3 = idle
@@ -100,6 +116,20 @@ class Minesweeper:
 		# self.sprites.append(self.modal)
 
 	def _initGame(self):
+		# seeded per game and moves kept, so finished games can be replayed by render.py.
+		# Board settings are captured now, resizing changes them before the game is saved
+		self.seed = random.randrange(2 ** 32)
+		self.random = random.Random(self.seed)
+		self.moves = []
+		self.gameRecord = {
+			'version': GAME_RECORD_VERSION,
+			'seed': self.seed,
+			'width': self.settings.boardWidth,
+			'height': self.settings.boardHeight,
+			'bombRatio': self.settings.bombRatio,
+			'moves': self.moves,
+		}
+
 		self.cells = []
 		for row in range(self.settings.boardHeight):
 			self.cells.append([])
@@ -114,8 +144,8 @@ class Minesweeper:
 	def _generateBombs(self, bombCount):
 		bombs = 0
 		while bombs < bombCount:
-			randomRow = random.randint(0, self.settings.boardHeight - 1)
-			randomCol = random.randint(0, self.settings.boardWidth - 1)
+			randomRow = self.random.randint(0, self.settings.boardHeight - 1)
+			randomCol = self.random.randint(0, self.settings.boardWidth - 1)
 
 			cell = self.cells[randomRow][randomCol]
 			if not cell.isBomb and cell.isActive:
@@ -130,7 +160,8 @@ class Minesweeper:
 		self.screen.fill((255, 255, 255))
 
 		# Ensure program maintains a rate of 30 frames per second
-		self.clock.tick(30)
+		if not self.lowLatency:
+			self._waitForFrame()
 
 		if self.gameState == GameState.RUNNING.value:
 			self.gameTime = (pygame.time.get_ticks() - self.startTicks) / 1000
@@ -147,12 +178,38 @@ class Minesweeper:
 
 		# update the display
 		pygame.display.flip()
+		self.latency.markDisplayed()
+
+		if self.lowLatency:
+			self._waitForFrame()
+
+	def _waitForFrame(self):
+		# Sleep until the next frame at 30 frames per second is due. Waiting on the
+		# event queue rather than ticking the clock means inputs are timestamped as
+		# they arrive, so time spent waiting here counts towards their latency
+		self.frameDeadline = max(self.frameDeadline + 1 / 30, time.perf_counter())
+		while True:
+			remaining = self.frameDeadline - time.perf_counter()
+			if remaining <= 0:
+				break
+
+			event = pygame.event.wait(math.ceil(remaining * 1000))
+			if event.type == NOEVENT:
+				continue
+
+			self.waitedEvents.append((time.perf_counter(), event))
+
+			# handle input straight away rather than at the end of the frame
+			if self.lowLatency and event.type in (KEYDOWN, MOUSEBUTTONDOWN, MOUSEBUTTONUP, QUIT):
+				self.frameDeadline = time.perf_counter()
+				break
 
 	def resetGame(self):
 		# inc reset counter if reset during game
 		if self.gameState == GameState.RUNNING.value:
 			self.settings.resets += 1
 			pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
+			self._saveGame()
 
 		for row in self.cells:
 			for cell in row:
@@ -176,55 +233,76 @@ class Minesweeper:
 
 	def _checkEvents(self):
 		# loop through all events in queue
-		for event in pygame.event.get():
-			self.modal.handleEvents(event)
-
-			# did the user click the window close button?
-			if event.type == QUIT:
-				# quit pygame and exit
-				pygame.quit()
-				sys.exit()
-
-			if event.type == KEYDOWN and event.key == K_b:
-				self.showBombs = not self.showBombs
-				for row in self.cells:
-					for cell in row:
-						if cell.isBomb:
-							cell.applySprite(cell.bomb if self.showBombs else cell.cellStates[cell.lockedState])
-			
-			if event.type == KEYDOWN and event.key in (K_MINUS, K_EQUALS):
-				if event.key == K_EQUALS:
-					self.settings.scale += 0.25
-				if event.key == K_MINUS:
-					self.settings.scale -= 0.25
-
-				pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
-				self.resetGame()
-
-			if event.type == KEYDOWN and event.key in (K_UP, K_DOWN, K_LEFT, K_RIGHT):
-				if event.key == K_UP:
-					self.settings.boardHeight -= 1
-				if event.key == K_DOWN:
-					self.settings.boardHeight += 1
-				if event.key == K_LEFT:
-					self.settings.boardWidth -= 1
-				if event.key == K_RIGHT:
-					self.settings.boardWidth += 1
-
-				pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
-				self.resetGame()
-
-			if event.type == MOUSEBUTTONDOWN and self.gameState != GameState.LOCKED.value:
-				self._handleFaceMouseDown(event)
-				self._handleCellMouseDown(event)
-				self._handleButtonMouseDown(event)
-
-			if event.type == MOUSEBUTTONUP:
-				self._handleFaceMouseUp()
-				# handle cell click after face, so can apply correct sprite
-				# TODO: What? Why?
-				self._handleCellMouseUp(event)
-				self._handleButtonMouseUp(event)
+		# events that arrived after the last wait, while handling input or drawing,
+		# are timestamped now
+		events = self.waitedEvents + [(time.perf_counter(), event) for event in pygame.event.get()]
+		self.waitedEvents = []
+
+		for arrivalTime, event in events:
+			if event.type in (KEYDOWN, MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+				self.latency.markInput(arrivalTime)
+			self._handleEvent(event)
+
+	def _handleEvent(self, event):
+		self.modal.handleEvents(event)
+
+		# did the user click the window close button?
+		if event.type == QUIT:
+			print(self.latency.report(self._pacingName()))
+			# quit pygame and exit
+			pygame.quit()
+			sys.exit()
+
+		if event.type == KEYDOWN and event.key == K_b:
+			self.showBombs = not self.showBombs
+			for row in self.cells:
+				for cell in row:
+					if cell.isBomb:
+						cell.applySprite(cell.bomb if self.showBombs else cell.cellStates[cell.lockedState])
+		
+		if event.type == KEYDOWN and event.key == K_l:
+			print(self.latency.report(self._pacingName()))
+
+		if event.type == KEYDOWN and event.key == K_p:
+			# report and start over, so the two pacing modes can be compared
+			print(self.latency.report(self._pacingName()))
+			self.lowLatency = not self.lowLatency
+			self.latency.reset()
+			print('Switched to ' + self._pacingName())
+
+		if event.type == KEYDOWN and event.key in (K_MINUS, K_EQUALS):
+			if event.key == K_EQUALS:
+				self.settings.scale += 0.25
+			if event.key == K_MINUS:
+				self.settings.scale -= 0.25
+
+			pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
+			self.resetGame()
+
+		if event.type == KEYDOWN and event.key in (K_UP, K_DOWN, K_LEFT, K_RIGHT):
+			if event.key == K_UP:
+				self.settings.boardHeight -= 1
+			if event.key == K_DOWN:
+				self.settings.boardHeight += 1
+			if event.key == K_LEFT:
+				self.settings.boardWidth -= 1
+			if event.key == K_RIGHT:
+				self.settings.boardWidth += 1
+
+			pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
+			self.resetGame()
+
+		if event.type == MOUSEBUTTONDOWN and self.gameState != GameState.LOCKED.value:
+			self._handleFaceMouseDown(event)
+			self._handleCellMouseDown(event)
+			self._handleButtonMouseDown(event)
+
+		if event.type == MOUSEBUTTONUP:
+			self._handleFaceMouseUp()
+			# handle cell click after face, so can apply correct sprite
+			# TODO: What? Why?
+			self._handleCellMouseUp(event)
+			self._handleButtonMouseUp(event)
 
 	def _handleFaceMouseDown(self, event):
 		if event.button == 1 and self.face.rect.collidepoint(pygame.mouse.get_pos()):
@@ -233,8 +311,8 @@ class Minesweeper:
 
 	def _handleCellMouseDown(self, event):
 		flaggedCells = 0
-		for row in self.cells:
-			for cell in row:
+		for rowIndex, row in enumerate(self.cells):
+			for colIndex, cell in enumerate(row):
 				if cell.isActive and cell.rect.collidepoint(pygame.mouse.get_pos()):
 					self.face.applySprite(self.face.cellPushed)
 					# if left clicking, handle cell opening
@@ -244,6 +322,7 @@ class Minesweeper:
 
 					# if right clicking, handle cell flagging and question marking
 					if event.button == 3 and cell.isActive:
+						self.moves.append([rowIndex, colIndex, 3])
 						cell.lockedState = 0 if cell.lockedState == 2 else cell.lockedState + 1
 						cell.applySprite(cell.cellStates[cell.lockedState])
 			
@@ -275,6 +354,7 @@ class Minesweeper:
 				if cell.isActive:
 					if cell.isPressed and cell.rect.collidepoint(pygame.mouse.get_pos()):
 						self.clickCount += 1
+						self.moves.append([self.cells.index(row), row.index(cell), 1])
 
 						if self.clickCount == 1:
 							self.startTicks = pygame.time.get_ticks()
@@ -340,6 +420,7 @@ class Minesweeper:
 		self.settings.losses += 1
 		self.settings.lossLengths.append(self.gameTime)
 		pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
+		self._saveGame()
 
 		# update game variables
 		self.face.applySprite(self.face.dead)
@@ -362,6 +443,10 @@ class Minesweeper:
 		print('Use <Arrow Keys> to change the width and height of the board')
 		print('Use <Minus> and <Plus> to change the scale of the UI')
 		print('Use <B> to reveal/hide bombs')
+		print('Use <L> to print input latency, <P> to switch frame pacing')
+
+	def _pacingName(self):
+		return 'draw then sleep' if self.lowLatency else 'sleep then draw'
 
 	def toggleDialog(self):
 		if not self.modal.open:
@@ -370,6 +455,11 @@ class Minesweeper:
 		self.modal.toggleOpen()
 
 
+	def _saveGame(self):
+		# one JSON line per game, in the format render.py --games reads
+		with open('games.jsonl', 'a') as gamesFile:
+			gamesFile.write(json.dumps(self.gameRecord) + '\n')
+
 	def _checkWinCondition(self):
 		expectedRevealedCount = math.floor((self.settings.boardWidth * self.settings.boardHeight) - self.bombCount)
 		if self.revealedCellCount == expectedRevealedCount:
@@ -377,6 +467,7 @@ class Minesweeper:
 			self.settings.wins += 1
 			self.settings.winLengths.append(self.gameTime)
 			pickle.dump(self.settings, open('save', 'wb'), pickle.HIGHEST_PROTOCOL)
+			self._saveGame()
 
 			# update game variables
 			self.face.applySprite(self.face.win)
@@ -389,5 +480,5 @@ class Minesweeper:
 						cell.applySprite(cell.flag)
 
 if __name__ == '__main__':
-	minesweeper = Minesweeper()
+	minesweeper = Minesweeper('--low-latency' in sys.argv)
 	minesweeper.runGame()
\ No newline at end of file
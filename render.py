@@ -0,0 +1,398 @@
+# Minesweeper batch renderer
+# Renders boards to PNG without opening a game window, using the same
+# sprite sheets and scale as the game. Work is fanned out over a process pool.
+#
+# Boards come from seeds (--seeds 0-999,1234) or from a games file (--games),
+# one JSON object per line:
+#   {"version": 1, "seed": 7, "moves": [[row, col, button], ...], "width": 30, "height": 20}
+# button is 1 (left click, reveal) or 3 (right click, flag / question).
+# width, height and bombRatio are optional and default to the saved settings.
+# The game appends every finished game to games.jsonl in this format, so it can
+# be replayed here. Records from another version of the game's rules are skipped.
+
+import os
+import sys
+import time
+import json
+import math
+import random
+import argparse
+import itertools
+import threading
+import multiprocessing
+
+from classes import Cell, Face, Display, Button
+from settings import Settings
+from helpers import readOrCreatePickle
+from minesweeper import GAME_RECORD_VERSION
+
+# sprite sheets are found next to this file, wherever it's run from
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# sprites loaded once per worker process by _initWorker
+_sprites = None
+
+class ReplayBoard():
+	def __init__(self, seed, width, height, bombRatio):
+		self.width = width
+		self.height = height
+		self.random = random.Random(seed)
+
+		cellCount = width * height
+		self.bombCount = min(math.floor(cellCount * bombRatio), cellCount - 1)
+		self.bombs = [[False] * width for row in range(height)]
+		self.revealed = [[False] * width for row in range(height)]
+		# 0 = unlocked, 1 = flagged, 2 = question
+		self.lockedStates = [[0] * width for row in range(height)]
+
+		self.clickCount = 0
+		self.revealedCellCount = 0
+		self.lost = False
+		self.won = False
+		self.clickedBomb = None
+
+		self._generateBombs(self.bombCount)
+
+	def _generateBombs(self, bombCount):
+		bombs = 0
+		while bombs < bombCount:
+			row = self.random.randint(0, self.height - 1)
+			col = self.random.randint(0, self.width - 1)
+
+			if not self.bombs[row][col] and not self.revealed[row][col]:
+				self.bombs[row][col] = True
+				bombs += 1
+
+	def neighbouringBombs(self, row, col):
+		count = 0
+		for neighbourRow in range(max(row - 1, 0), min(row + 2, self.height)):
+			for neighbourCol in range(max(col - 1, 0), min(col + 2, self.width)):
+				if self.bombs[neighbourRow][neighbourCol]:
+					count += 1
+		return count
+
+	def applyMove(self, row, col, button):
+		if self.lost or self.won or self.revealed[row][col]:
+			return
+
+		if button == 3:
+			self.lockedStates[row][col] = (self.lockedStates[row][col] + 1) % 3
+			return
+
+		if button != 1 or self.lockedStates[row][col] == 1:
+			return
+
+		self.clickCount += 1
+		if self.bombs[row][col]:
+			if self.clickCount == 1:
+				# first click is never a bomb, move it elsewhere like the game does
+				self.bombs[row][col] = False
+				self.revealed[row][col] = True
+				self._generateBombs(1)
+				self.revealed[row][col] = False
+			else:
+				self.lost = True
+				self.clickedBomb = (row, col)
+				return
+
+		self._reveal(row, col)
+
+	def _reveal(self, row, col):
+		# iterative flood, big boards would overflow the stack recursing
+		pending = [(row, col)]
+		while pending:
+			row, col = pending.pop()
+			if self.revealed[row][col]:
+				continue
+			self.revealed[row][col] = True
+			self.revealedCellCount += 1
+
+			if self.neighbouringBombs(row, col) == 0:
+				for neighbourRow in range(max(row - 1, 0), min(row + 2, self.height)):
+					for neighbourCol in range(max(col - 1, 0), min(col + 2, self.width)):
+						if not self.revealed[neighbourRow][neighbourCol] and not self.lockedStates[neighbourRow][neighbourCol] == 1:
+							pending.append((neighbourRow, neighbourCol))
+
+		if self.revealedCellCount == self.width * self.height - self.bombCount:
+			self.won = True
+
+	def cellSprite(self, row, col, reveal = False):
+		isBomb = self.bombs[row][col]
+		lockedState = self.lockedStates[row][col]
+
+		if self.revealed[row][col]:
+			neighbours = self.neighbouringBombs(row, col)
+			return Cell.clicked if neighbours == 0 else Cell.numberSprites[neighbours - 1]
+		if self.won and isBomb:
+			return Cell.flag
+		if self.lost or reveal:
+			if isBomb and not lockedState == 1:
+				return Cell.bombClicked if (row, col) == self.clickedBomb else Cell.bomb
+			if not isBomb and lockedState == 1:
+				return Cell.bombIncorrect
+		if reveal and not isBomb:
+			neighbours = self.neighbouringBombs(row, col)
+			return Cell.clicked if neighbours == 0 else Cell.numberSprites[neighbours - 1]
+		return Cell.cellStates[lockedState]
+
+	def flagCount(self):
+		return sum(row.count(1) for row in self.lockedStates)
+
+def _initWorker(scale):
+	global _sprites
+	# no window is ever shown, but convert() needs a display mode to be set.
+	# SDL would otherwise swallow SIGTERM and the pool couldn't stop its workers
+	os.environ['SDL_VIDEODRIVER'] = 'dummy'
+	os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+	import pygame
+	from spritesheet import SpriteSheet
+	pygame.display.init()
+	pygame.display.set_mode((1, 1))
+
+	def loadSprites(filename, rects, width, height):
+		sheet = SpriteSheet(os.path.join(BASE_DIR, 'spritesheets', filename))
+		size = (int(width * scale), int(height * scale))
+		return {rect: pygame.transform.scale(sheet.image_at(rect), size) for rect in rects}
+
+	cellRects = [Cell.normal, Cell.clicked, Cell.flag, Cell.question, Cell.bomb, Cell.bombClicked, Cell.bombIncorrect] + Cell.numberSprites
+	faceSprites = loadSprites('face-sprites.png', [Face.smile, Face.win, Face.dead], 24, 24)
+	for surf in faceSprites.values():
+		surf.set_colorkey((255, 255, 255), pygame.RLEACCEL)
+	buttonRects = [Button.buttonSprites['blank'][0], Button.buttonSprites['config'][0]]
+
+	_sprites = {
+		'scale': scale,
+		'cell': loadSprites('cell-sprites.png', cellRects, 16, 16),
+		'face': faceSprites,
+		'button': loadSprites('button-sprites.png', buttonRects, 24, 24),
+		'number': loadSprites('number-sprites.png', Display.numberSprites + [Display.negative], 13, 23),
+	}
+
+def _drawDisplay(surface, x, number, length):
+	scale = _sprites['scale']
+	paddedNumber = str(math.trunc(number)).zfill(length)
+	for index in range(length):
+		if number < 0 and index == 0:
+			sprite = _sprites['number'][Display.negative]
+		else:
+			sprite = _sprites['number'][Display.numberSprites[int(paddedNumber[index])]]
+		surface.blit(sprite, (x + (13 * scale) * index, 0))
+
+def _drawBoard(board, reveal, displayLength):
+	import pygame
+	scale = _sprites['scale']
+	cellSize = 16 * scale
+	faceButtonRowHeight = 60 * scale
+	width = int(board.width * cellSize)
+	height = int(board.height * cellSize + faceButtonRowHeight)
+
+	surface = pygame.Surface((width, height))
+	surface.fill((255, 255, 255))
+
+	_drawDisplay(surface, 0, board.bombCount - board.flagCount(), displayLength)
+	_drawDisplay(surface, width - (displayLength * 13) * scale, 0, displayLength)
+
+	middleOfRow = faceButtonRowHeight / 2
+	faceSprite = Face.win if board.won else Face.dead if board.lost else Face.smile
+	face = _sprites['face'][faceSprite]
+	surface.blit(face, face.get_rect(center=(width / 2, middleOfRow)))
+
+	# controls and config buttons, laid out as in Minesweeper._initUi
+	positionNextToFace = ((width / 2) + 24 * scale) + 12 * scale
+	for index, type in enumerate(('blank', 'config')):
+		button = _sprites['button'][Button.buttonSprites[type][0]]
+		surface.blit(button, button.get_rect(center=(positionNextToFace + 24 * scale * index, middleOfRow)))
+
+	for row in range(board.height):
+		for col in range(board.width):
+			sprite = _sprites['cell'][board.cellSprite(row, col, reveal)]
+			surface.blit(sprite, (col * cellSize, row * cellSize + faceButtonRowHeight))
+
+	return surface
+
+def renderJobs(jobs):
+	return sum(renderJob(job) for job in jobs)
+
+def renderJob(job):
+	import pygame
+	board = ReplayBoard(job['seed'], job['width'], job['height'], job['bombRatio'])
+	moves = job['moves']
+	every = job['every']
+	images = 0
+
+	def save(step, reveal = False):
+		surface = _drawBoard(board, reveal, job['displayLength'])
+		pygame.image.save(surface, os.path.join(job['outdir'], '%s-%04d.png' % (job['name'], step)))
+
+	for step, (row, col, button) in enumerate(moves, 1):
+		board.applyMove(row, col, button)
+		if every and step % every == 0 and step != len(moves):
+			save(step)
+			images += 1
+
+	save(len(moves), job['reveal'])
+	return images + 1
+
+def parseSeeds(text):
+	for part in text.split(','):
+		if '-' in part:
+			start, end = part.split('-')
+			yield from range(int(start), int(end) + 1)
+		elif part:
+			yield int(part)
+
+def _orDefault(value, default):
+	return value if value is not None else default
+
+def _isInt(value):
+	# JSON true and false load as bools, which are ints in Python
+	return isinstance(value, int) and not isinstance(value, bool)
+
+def validateGame(game):
+	# returns why a game can't be replayed, or None if it can
+	if game.get('version') != GAME_RECORD_VERSION:
+		return 'recorded with version %r of the rules, expected %d' % (game.get('version'), GAME_RECORD_VERSION)
+	if not _isInt(game.get('seed')):
+		return 'missing or non-integer seed'
+
+	width, height = game['width'], game['height']
+	if not _isInt(width) or not _isInt(height) or width < 1 or height < 1:
+		return 'width and height must be positive integers'
+	bombRatio = game['bombRatio']
+	if isinstance(bombRatio, bool) or not isinstance(bombRatio, (int, float)) or not 0 <= bombRatio <= 1:
+		return 'bombRatio must be between 0 and 1'
+	if not isinstance(game['moves'], list):
+		return 'moves must be a list'
+
+	for index, move in enumerate(game['moves']):
+		if not isinstance(move, list) or len(move) != 3 or not all(_isInt(value) for value in move):
+			return 'move %d is not [row, col, button]' % index
+		row, col, button = move
+		if not 0 <= row < height or not 0 <= col < width:
+			return 'move %d is off the %dx%d board' % (index, width, height)
+		if button not in (1, 3):
+			return 'move %d has button %d, expected 1 or 3' % (index, button)
+
+	return None
+
+def iterJobs(args, settings):
+	defaults = {
+		'width': _orDefault(args.width, settings.boardWidth),
+		'height': _orDefault(args.height, settings.boardHeight),
+		'bombRatio': _orDefault(args.bomb_ratio, settings.bombRatio),
+		'displayLength': settings.displayLength,
+		'every': args.every,
+		'reveal': args.reveal,
+		'outdir': args.outdir,
+		'moves': [],
+	}
+
+	if args.seeds:
+		for seed in parseSeeds(args.seeds):
+			yield dict(defaults, name='seed-%d' % seed, seed=seed)
+
+	if args.games:
+		# read lazily so a huge games file is never held in memory
+		with open(args.games) as gamesFile:
+			for lineNumber, line in enumerate(gamesFile, 1):
+				if not line.strip():
+					continue
+				try:
+					game = json.loads(line)
+				except ValueError as e:
+					print('Skipping line %d of %s: %s' % (lineNumber, args.games, e))
+					continue
+
+				if not isinstance(game, dict):
+					print('Skipping line %d of %s: not a JSON object' % (lineNumber, args.games))
+					continue
+
+				job = dict(defaults, name='game-%d' % lineNumber)
+				job.update({key: game[key] for key in ('version', 'seed', 'width', 'height', 'bombRatio', 'moves') if key in game})
+				error = validateGame(job)
+				if error:
+					print('Skipping line %d of %s: %s' % (lineNumber, args.games, error))
+					continue
+				yield job
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description='Render Minesweeper boards to PNG without opening a window.')
+	parser.add_argument('--seeds', help='board seeds to render, e.g. "0-999,1234"')
+	parser.add_argument('--games', help='file of JSON lines with a seed and a list of [row, col, button] moves')
+	parser.add_argument('--outdir', default='renders', help='directory the PNGs are written to')
+	parser.add_argument('--every', type=int, default=0, help='also render every N moves, not just the final state')
+	parser.add_argument('--reveal', action='store_true', help='show the whole solution in the final image')
+	parser.add_argument('--width', type=int, help='board width, defaults to the saved settings')
+	parser.add_argument('--height', type=int, help='board height, defaults to the saved settings')
+	parser.add_argument('--bomb-ratio', type=float, help='bomb ratio, defaults to the saved settings')
+	parser.add_argument('--scale', type=float, help='sprite scale, defaults to the saved settings')
+	parser.add_argument('--processes', type=int, default=os.cpu_count(), help='worker processes, defaults to all cores')
+	parser.add_argument('--chunksize', type=int, default=16, help='boards handed to a worker at a time')
+	args = parser.parse_args(argv)
+
+	if not args.seeds and not args.games:
+		parser.error('nothing to render, pass --seeds and/or --games')
+	for name in ('width', 'height', 'scale', 'processes', 'chunksize'):
+		value = getattr(args, name)
+		if value is not None and value <= 0:
+			parser.error('--%s must be greater than 0' % name)
+	if args.every < 0:
+		parser.error('--every must not be negative')
+	if args.bomb_ratio is not None and not 0 <= args.bomb_ratio <= 1:
+		parser.error('--bomb-ratio must be between 0 and 1')
+
+	settings = readOrCreatePickle('save', Settings())
+	scale = _orDefault(args.scale, settings.scale)
+
+	# load the sprites here first, so a missing or broken sprite sheet fails once
+	# with a clear error instead of in every pool worker
+	try:
+		_initWorker(scale)
+	except (OSError, SystemExit) as e:
+		sys.exit('Unable to load the sprite sheets: %s' % e)
+	os.makedirs(args.outdir, exist_ok=True)
+
+	# Pool.imap reads its whole input up front, so submit chunks one at a time and
+	# only keep a few per worker in flight. Memory stays flat however many boards
+	# are rendered, and workers never wait for a whole batch to finish
+	inFlight = threading.BoundedSemaphore(args.processes * 4)
+	progress = {'boards': 0, 'images': 0, 'failed': 0}
+	startTime = time.perf_counter()
+
+	def onDone(boards, images):
+		progress['boards'] += boards
+		progress['images'] += images
+		if progress['boards'] // 1000 != (progress['boards'] - boards) // 1000:
+			elapsed = time.perf_counter() - startTime
+			print('%d boards, %d images, %.1f boards/s' % (progress['boards'], progress['images'], progress['boards'] / elapsed))
+		inFlight.release()
+
+	def onError(boards, error):
+		progress['failed'] += boards
+		print('Failed to render %d boards: %r' % (boards, error))
+		inFlight.release()
+
+	with multiprocessing.Pool(args.processes, _initWorker, (scale,)) as pool:
+		jobs = iterJobs(args, settings)
+		while True:
+			chunk = list(itertools.islice(jobs, args.chunksize))
+			if not chunk:
+				break
+
+			inFlight.acquire()
+			size = len(chunk)
+			pool.apply_async(renderJobs, (chunk,),
+				callback=lambda images, size=size: onDone(size, images),
+				error_callback=lambda error, size=size: onError(size, error))
+
+		pool.close()
+		pool.join()
+
+	elapsed = time.perf_counter() - startTime
+	boards = progress['boards']
+	print('Rendered %d images of %d boards in %.2fs (%.1f boards/s)' % (progress['images'], boards, elapsed, boards / elapsed if elapsed else 0))
+	if progress['failed']:
+		print('%d boards failed to render' % progress['failed'])
+
+if __name__ == '__main__':
+	main(sys.argv[1:])